@@ -0,0 +1,7 @@
+# 19/10/2026
+"""Entrypoint de la prueba de carga de StockScraper."""
+
+from source import loadtest
+
+if __name__ == "__main__":
+    loadtest.run()
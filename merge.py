@@ -0,0 +1,7 @@
+# 19/10/2026
+"""Entrypoint de la unión de resultados de StockScraper."""
+
+from source import merge
+
+if __name__ == "__main__":
+    merge.run()
@@ -1,6 +1,7 @@
-# 05/11/2024
+# 19/10/2026
 """Archivo de inicialización del paquete source."""
 
+from .loader import iter_results, load_results
 from .stockscraper import StockScraper
 
-__all__ = ["StockScraper"]
+__all__ = ["StockScraper", "iter_results", "load_results"]
@@ -1,9 +1,10 @@
-# 08/11/2024
+# 19/10/2026
 """Cliente de línea de comandos para StockScraper."""
 
 import argparse
 
 from source import StockScraper
+from source.stockscraper import DEFAULT_MARKET_LISTS, MARKET_LISTS
 
 USE_COUNTRIES_SELECTOR = "<<use_countries_selector>>"
 
@@ -18,6 +19,9 @@ def setup() -> argparse.ArgumentParser:
     -o --output <path-to-dir-where-to-put-the-output-csv>
     -l --loops <loops-to-make>
     -w --wait <time-to-wait-in-minutes>
+    --lists <market-lists-to-scrape>
+    --watchlist <path-to-watchlist-csv>
+    --profile
     --testing <ignore-else-and-test>
 
     Devuelve el parser configurado con los argumentos anteriores.
@@ -93,6 +97,34 @@ def setup() -> argparse.ArgumentParser:
         default=0,
         help="Tiempo de espera entre iteraciones (en minutos)",
     )
+    # --lists
+    parser.add_argument(
+        "--lists",
+        nargs="+",
+        choices=MARKET_LISTS,
+        default=list(DEFAULT_MARKET_LISTS),
+        help="Listas de acciones a consultar en cada país (por defecto, 'active')",
+    )
+    # --watchlist
+    parser.add_argument(
+        "--watchlist",
+        type=str,
+        help="""
+            Ruta al archivo CSV con las acciones vigiladas (columnas 'Country' y
+            'Symbol'). Sólo se guardarán esas acciones, y sólo se consultarán
+            los países con alguna acción vigilada.
+        """,
+    )
+    # --profile
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="""
+            Captura perfiles de CPU y memoria de cada fase, y los guarda en la
+            carpeta 'profile/<fecha>-<hora>' junto al archivo de salida. El
+            análisis de cada página se vuelve unas 6 veces más lento
+        """,
+    )
     # --testing
     parser.add_argument(
         "--testing",
@@ -111,17 +143,19 @@ def run() -> None:
     # Testing
     if args.testing:
         print("Modo testing activado")
-        scraper = StockScraper(verbose_mode=2)
+        scraper = StockScraper(verbose_mode=2, profile=args.profile)
         scraper.scrape("testing")
         return
 
     # Ajustando el nivel de verbosidad
     if args.quiet:
-        scraper = StockScraper(verbose_mode=0)
+        scraper = StockScraper(verbose_mode=0, profile=args.profile)
     else:
         print("Bienvenido a StockScraper")
         print("Se seleccionarán los países si procede, y se extraerán los datos")
-        scraper = StockScraper(verbose_mode=2 if args.verbose else 1)
+        scraper = StockScraper(
+            verbose_mode=2 if args.verbose else 1, profile=args.profile
+        )
 
     # Gestión de lista de países
     if args.all_countries:
@@ -137,4 +171,6 @@ def run() -> None:
         loops=args.loops,
         wait=args.wait,
         output_dir=args.output,
+        lists=args.lists,
+        watchlist=args.watchlist,
     )
@@ -0,0 +1,212 @@
+# 19/10/2026
+"""Cargador de resultados de StockScraper
+
+Lee los archivos de resultados ('results.csv') generados por StockScraper y
+los convierte en DataFrames de pandas con tipos adecuados: números en coma
+flotante (float64) para el instante de tiempo, el precio, el volumen y la
+capitalización; y categorías para la región, el país, la moneda, el sector
+y las listas de acciones en las que aparece cada fila.
+
+Los archivos se mapean en memoria y se procesan por bloques de tamaño fijo,
+de forma que se pueden recorrer históricos que no caben en memoria mediante
+'iter_results', o cargarlos de una sola vez mediante 'load_results'.
+
+"""
+
+import csv
+import mmap
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from more_itertools import chunked
+from pandas.api.types import union_categoricals
+
+from source.stockscraper import RESULTS_CSV_HEADER
+from source.utils import check_path
+
+DEFAULT_CHUNK_SIZE = 65_536
+
+FLOAT_COLUMNS = {"Timestamp", "Price", "Volume (M)", "Market Cap (M)"}
+CATEGORY_COLUMNS = {"Region", "Country", "Currency", "Sector", "Lists"}
+# Columnas ausentes en archivos generados por versiones anteriores
+OPTIONAL_COLUMNS = {"Lists"}
+
+TimeBound = float | datetime | None
+
+
+def iter_results(
+    path: str | Path,
+    *,
+    columns: Iterable[str] | None = None,
+    start: TimeBound = None,
+    end: TimeBound = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """Recorre un archivo de resultados por bloques
+
+    'columns' permite seleccionar qué columnas se cargan (por defecto, todas
+    las de 'RESULTS_CSV_HEADER'), y 'start' y 'end' limitan las filas a las
+    de instante de tiempo dentro del intervalo [start, end). Ambos extremos
+    pueden ser un 'timestamp' de UNIX o un objeto datetime.
+
+    Devuelve un iterador con un DataFrame por cada bloque de, como mucho,
+    'chunk_size' filas leídas del archivo. Los bloques que quedan vacíos tras
+    aplicar el filtro temporal se omiten. Los argumentos se comprueban al
+    llamar a la función, no al empezar a recorrer el iterador.
+
+    """
+    columns = _check_columns(columns)
+    start, end = _to_timestamp(start), _to_timestamp(end)
+    if chunk_size < 1:
+        raise ValueError(f"El tamaño de bloque debe ser positivo ({chunk_size})")
+    path = check_path(path, raises=True)
+    return _iter_chunks(path, columns, start, end, chunk_size)
+
+
+def load_results(
+    path: str | Path,
+    *,
+    columns: Iterable[str] | None = None,
+    start: TimeBound = None,
+    end: TimeBound = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> pd.DataFrame:
+    """Carga un archivo de resultados completo en un DataFrame
+
+    Acepta los mismos argumentos que 'iter_results', y une todos sus bloques
+    en un único DataFrame, conservando los tipos de cada columna (las
+    categorías de los distintos bloques se unifican).
+
+    """
+    columns = _check_columns(columns)
+    frames = list(
+        iter_results(path, columns=columns, start=start, end=end, chunk_size=chunk_size)
+    )
+    if not frames:
+        return _parse_chunk([], {}, columns, None, None)
+    data = {}
+    for name in columns:
+        parts = [frame[name] for frame in frames]
+        if name in CATEGORY_COLUMNS:
+            data[name] = union_categoricals(parts)
+        else:
+            data[name] = np.concatenate([part.to_numpy() for part in parts])
+    return pd.DataFrame(data, columns=columns)
+
+
+# Privados
+
+
+def _check_columns(columns: Iterable[str] | None) -> list[str]:
+    """Comprueba que las columnas solicitadas sean válidas"""
+    if columns is None:
+        return list(RESULTS_CSV_HEADER)
+    columns = list(columns)
+    unknown = [name for name in columns if name not in RESULTS_CSV_HEADER]
+    if unknown:
+        raise ValueError(f"Columnas desconocidas: {', '.join(unknown)}")
+    return columns
+
+
+def _iter_chunks(
+    path: Path,
+    columns: list[str],
+    start: float | None,
+    end: float | None,
+    chunk_size: int,
+) -> Iterator[pd.DataFrame]:
+    """Recorre por bloques un archivo de resultados (ver 'iter_results')"""
+    # Un archivo vacío no se puede mapear en memoria, y tampoco tiene datos
+    if path.stat().st_size == 0:
+        return
+    with (
+        open(path, "rb") as file,
+        mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+    ):
+        lines = (line.decode("utf-8") for line in iter(mm.readline, b""))
+        reader = csv.reader(lines)
+        header = next(reader, None)
+        if header is None:
+            return
+        indexes = _header_indexes(header, columns, path)
+        for rows in chunked(reader, chunk_size):
+            frame = _parse_chunk(rows, indexes, columns, start, end)
+            if len(frame):
+                yield frame
+
+
+def _to_timestamp(bound: TimeBound) -> float | None:
+    """Convierte un extremo del intervalo temporal a 'timestamp' de UNIX"""
+    if isinstance(bound, datetime):
+        return bound.timestamp()
+    return None if bound is None else float(bound)
+
+
+def _header_indexes(
+    header: list[str], columns: list[str], path: Path
+) -> dict[str, int]:
+    """Ubica en la cabecera del archivo las columnas necesarias
+
+    Las columnas opcionales que no estén en el archivo no se incluyen, y se
+    cargarán vacías.
+
+    """
+    required = [
+        name for name in [*columns, "Timestamp"] if name not in OPTIONAL_COLUMNS
+    ]
+    missing = [name for name in required if name not in header]
+    if missing:
+        raise ValueError(
+            f"El archivo {path} no es un archivo de resultados válido "
+            f"(faltan las columnas {', '.join(missing)})"
+        )
+    return {
+        name: header.index(name) for name in [*columns, "Timestamp"] if name in header
+    }
+
+
+def _parse_chunk(
+    rows: list[list[str]],
+    indexes: dict[str, int],
+    columns: list[str],
+    start: float | None,
+    end: float | None,
+) -> pd.DataFrame:
+    """Convierte un bloque de filas del CSV en un DataFrame tipado"""
+    # Primero se aplica el filtro temporal, para no convertir filas descartadas
+    if start is not None or end is not None:
+        idx = indexes["Timestamp"]
+        timestamps = np.fromiter(
+            (float(row[idx]) for row in rows), dtype=np.float64, count=len(rows)
+        )
+        mask = np.ones(len(rows), dtype=bool)
+        if start is not None:
+            mask &= timestamps >= start
+        if end is not None:
+            mask &= timestamps < end
+        rows = [rows[i] for i in np.flatnonzero(mask)]
+    n = len(rows)
+    data = {}
+    for name in columns:
+        idx = indexes.get(name)
+        values = [row[idx] for row in rows] if idx is not None else [""] * n
+        if name in FLOAT_COLUMNS:
+            # Los campos vacíos (p.ej. 'Market Cap (M)') se convierten en NaN
+            data[name] = np.fromiter(
+                (float(value) if value else np.nan for value in values),
+                dtype=np.float64,
+                count=n,
+            )
+        elif name in CATEGORY_COLUMNS:
+            # Los campos vacíos (p.ej. 'Sector') se convierten en NaN. Las
+            # categorías se fijan como texto, para poder unificar bloques
+            categories = pd.Index(sorted(set(values) - {""}), dtype=object)
+            data[name] = pd.Categorical(
+                [value or None for value in values], categories=categories
+            )
+        else:
+            data[name] = np.array(values, dtype=object)
+    return pd.DataFrame(data, columns=columns)
@@ -0,0 +1,257 @@
+# 19/10/2026
+"""Prueba de carga de StockScraper
+
+Ejecuta 'StockScraper.scrape' contra un servidor de mercado simulado
+(MockMarketServer) y mide su rendimiento de principio a fin: instantáneas
+(pasadas completas por todos los países) y consultas HTTP por minuto, filas
+por segundo, latencia por país (percentiles 50 y 99) y pico de memoria
+residente. Permite comparar estrategias de scraping sin acceder a la web
+real, de forma reproducible.
+
+"""
+
+import argparse
+import sys
+import tempfile
+from collections.abc import Container
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+import requests
+
+from source.mockserver import MockMarketServer
+from source.stockscraper import (
+    DEFAULT_DATA_DIR,
+    DEFAULT_MARKET_LISTS,
+    MARKET_LISTS,
+    VERBOSE_SILENT,
+    StockScraper,
+)
+
+
+class _TimedScraper(StockScraper):
+    """StockScraper que mide la latencia y las filas de cada país, y cuenta
+    las consultas HTTP"""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.latencies: list[float] = []
+        self.rows = 0
+        self.requests = 0
+
+    def _country_scrape(
+        self,
+        url_token: str,
+        lists: list[str],
+        session: requests.Session | None = None,
+        *,
+        only: Container[str] | None = None,
+    ) -> list[tuple]:
+        tstart = perf_counter()
+        data = super()._country_scrape(url_token, lists, session, only=only)
+        self.latencies.append(perf_counter() - tstart)
+        self.rows += len(data)
+        return data
+
+    def _get(
+        self, url: str, session: requests.Session | None = None
+    ) -> requests.Response:
+        res = super()._get(url, session)
+        self.requests += 1
+        return res
+
+
+def load_test(
+    countries: str | Path,
+    *,
+    runs: int = 3,
+    lists: list[str] | tuple[str, ...] = DEFAULT_MARKET_LISTS,
+    watchlist: str | Path | None = None,
+    **server_options,
+) -> dict[str, float | None]:
+    """Ejecuta la prueba de carga
+
+    Inicia un MockMarketServer con los países de 'countries' (al que se le
+    pasan el resto de argumentos, 'server_options') y realiza 'runs'
+    instantáneas completas con StockScraper, consultando las listas 'lists' y,
+    si se indica, sólo las acciones de 'watchlist'.
+    Los resultados se escriben en un directorio temporal.
+
+    Devuelve un diccionario con las métricas obtenidas. Si no se consulta
+    ningún país (p.ej. porque ninguno tiene acciones vigiladas), las latencias
+    son None.
+
+    """
+    if runs < 1:
+        raise ValueError(f"El número de instantáneas debe ser positivo ({runs})")
+    with (
+        MockMarketServer(countries, **server_options) as server,
+        tempfile.TemporaryDirectory() as output_dir,
+    ):
+        scraper = _TimedScraper(verbose_mode=VERBOSE_SILENT, stocks_url=server.url)
+        tstart = perf_counter()
+        for _ in range(runs):
+            scraper.scrape(
+                countries,
+                loops=1,
+                output_dir=output_dir,
+                lists=lists,
+                watchlist=watchlist,
+            )
+        elapsed = perf_counter() - tstart
+    latencies = np.array(scraper.latencies)
+    if len(latencies):
+        p50, p99 = (float(p) for p in np.percentile(latencies, [50, 99]))
+    else:
+        p50 = p99 = None
+    return {
+        "snapshots_per_minute": runs / elapsed * 60,
+        "requests_per_minute": scraper.requests / elapsed * 60,
+        "rows_per_second": scraper.rows / elapsed,
+        "latency_p50": p50,
+        "latency_p99": p99,
+        "peak_rss_mb": _peak_rss_mb(),
+        "elapsed": elapsed,
+    }
+
+
+def _peak_rss_mb() -> float | None:
+    """Devuelve el pico de memoria residente del proceso, en MB
+
+    Sólo está disponible en sistemas tipo UNIX; en otro caso devuelve None.
+
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo expresa en KB, y macOS en bytes
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def _format(value: float | None, scale: float, unit: str) -> str:
+    """Formatea una métrica, que puede no estar disponible"""
+    return f"{value * scale:.1f} {unit}" if value is not None else "no disponible"
+
+
+def setup() -> argparse.ArgumentParser:
+    """Setup de los comandos válidos
+
+    -c --countries <path-to-countries-csv>
+    -p --pages <path-to-dir-with-saved-pages>
+    -r --runs <runs-to-make>
+    --lists <market-lists-to-scrape>
+    --watchlist <path-to-watchlist-csv>
+    --latency <server-latency-in-ms>
+    --jitter <server-jitter-in-ms>
+    --error-rate <server-error-rate>
+    --rate-limit <server-max-requests-per-second>
+    --retry-after <server-retry-after-in-seconds>
+    --seed <random-seed>
+
+    Devuelve el parser configurado con los argumentos anteriores.
+
+    """
+    parser = argparse.ArgumentParser(
+        description="Prueba de carga de StockScraper contra un servidor simulado"
+    )
+    parser.add_argument(
+        "-c",
+        "--countries",
+        type=str,
+        default=str(DEFAULT_DATA_DIR / "countries.csv"),
+        help="Ruta al archivo CSV con los países a simular",
+    )
+    parser.add_argument(
+        "-p",
+        "--pages",
+        type=str,
+        help="""
+            Ruta al directorio con las páginas guardadas ('<token>-<lista>.html')\n
+            Si no se proporciona, se generan páginas sintéticas.
+        """,
+    )
+    parser.add_argument(
+        "-r",
+        "--runs",
+        type=int,
+        default=3,
+        help="Número de instantáneas (pasadas por todos los países) a realizar",
+    )
+    parser.add_argument(
+        "--lists",
+        nargs="+",
+        choices=MARKET_LISTS,
+        default=list(DEFAULT_MARKET_LISTS),
+        help="Listas de acciones a consultar en cada país (por defecto, 'active')",
+    )
+    parser.add_argument(
+        "--watchlist",
+        type=str,
+        help="Ruta al archivo CSV con las acciones vigiladas (país y símbolo)",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=50.0,
+        help="Latencia del servidor (en milisegundos)",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=10.0,
+        help="Variación aleatoria de la latencia del servidor (en milisegundos)",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Proporción de peticiones que fallan con un error 500",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        help="Máximo de peticiones por segundo antes de responder 429",
+    )
+    parser.add_argument(
+        "--retry-after",
+        type=float,
+        default=1.0,
+        help="Valor de la cabecera 'Retry-After' de las respuestas 429 (en segundos)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Semilla para los valores aleatorios del servidor",
+    )
+    return parser
+
+
+def run() -> None:
+    """Función principal de la prueba de carga"""
+    parser = setup()
+    args = parser.parse_args()
+
+    print(f"Prueba de carga: {args.runs} instantáneas de {', '.join(args.lists)}")
+    stats = load_test(
+        args.countries,
+        runs=args.runs,
+        lists=args.lists,
+        watchlist=args.watchlist,
+        pages_dir=args.pages,
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    print(f"Tiempo total:           {stats['elapsed']:.2f} s")
+    print(f"Instantáneas por min.:  {stats['snapshots_per_minute']:.2f}")
+    print(f"Consultas por minuto:   {stats['requests_per_minute']:.1f}")
+    print(f"Filas por segundo:      {stats['rows_per_second']:.1f}")
+    print(f"Latencia por país p50:  {_format(stats['latency_p50'], 1000, 'ms')}")
+    print(f"Latencia por país p99:  {_format(stats['latency_p99'], 1000, 'ms')}")
+    print(f"Pico de memoria (RSS):  {_format(stats['peak_rss_mb'], 1, 'MB')}")
@@ -0,0 +1,335 @@
+# 19/10/2026
+"""Unión de archivos de resultados de StockScraper
+
+Combina cualquier número de archivos de resultados ('results.csv') en un único
+histórico, ordenado por instante de tiempo y sin instantáneas duplicadas.
+
+Para poder tratar históricos mayores que la memoria disponible, los datos se
+procesan siempre en flujo, mediante una ordenación externa: las filas se
+ordenan por bloques de tamaño fijo, que se guardan en archivos temporales y
+después se mezclan ordenadamente.
+
+"""
+
+import argparse
+import csv
+import heapq
+import os
+import tempfile
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import ExitStack
+from pathlib import Path
+
+from more_itertools import chunked
+
+from source.stockscraper import (
+    DEFAULT_DATA_DIR,
+    LISTS_SEPARATOR,
+    MARKET_LISTS,
+    RESULTS_CSV_HEADER,
+)
+from source.utils import VerbosePrinter, check_path
+
+DEFAULT_RUN_SIZE = 200_000
+DEFAULT_TOLERANCE = 60.0
+# Máximo de bloques que se mezclan a la vez (y, por tanto, de archivos abiertos)
+MAX_FAN_IN = 64
+
+# Columnas ausentes en archivos generados por versiones anteriores
+OPTIONAL_COLUMNS = {"Lists"}
+
+IDX_TIMESTAMP = RESULTS_CSV_HEADER.index("Timestamp")
+IDX_COUNTRY = RESULTS_CSV_HEADER.index("Country")
+IDX_SYMBOL = RESULTS_CSV_HEADER.index("Symbol")
+IDX_LISTS = RESULTS_CSV_HEADER.index("Lists")
+
+Row = list[str]
+
+
+def merge_results(
+    paths: Iterable[str | Path],
+    output: str | Path,
+    *,
+    run_size: int = DEFAULT_RUN_SIZE,
+    tolerance: float = DEFAULT_TOLERANCE,
+    tmp_dir: str | Path | None = None,
+) -> tuple[int, int]:
+    """Une varios archivos de resultados en un histórico
+
+    Lee todas las filas de los archivos de 'paths', las ordena por país,
+    símbolo e instante de tiempo, y descarta las instantáneas duplicadas: las
+    de un mismo país y símbolo separadas 'tolerance' segundos o menos de la
+    última conservada (las idénticas incluidas). Como entre consultas hay, al
+    menos, 'T_MIN_WAIT' minutos, se trata de la misma instantánea guardada en
+    varios archivos. De cada grupo de duplicadas se conserva la primera, con
+    la unión de sus listas de acciones.
+
+    El resultado se escribe en 'output', ordenado por instante de tiempo. Se
+    puede usar como 'output' uno de los archivos de entrada: sólo se
+    sobrescribe al terminar.
+
+    En memoria se mantienen, como mucho, 'run_size' filas a la vez (más una
+    por bloque durante las mezclas); el resto se guardan en archivos
+    temporales, en 'tmp_dir' (por defecto, el directorio temporal del
+    sistema).
+
+    Devuelve el número de filas leídas y el de filas escritas.
+
+    """
+    if run_size < 1:
+        raise ValueError(f"El tamaño de bloque debe ser positivo ({run_size})")
+    paths = [check_path(path, raises=True) for path in paths]
+    output = Path(output)
+    check_path(output.parent, is_dir=True, raises=True)
+    counter = [0]
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as tmp:
+        tmp = Path(tmp)
+        rows = _count(_read_rows(paths), counter)
+        rows = _external_sort(rows, _key_symbol, run_size, tmp / "symbol")
+        rows = _dedupe(rows, tolerance)
+        rows = _external_sort(rows, _key_time, run_size, tmp / "time")
+        # Se escribe en un archivo temporal, que sólo al final reemplaza a
+        # 'output', por si es también uno de los archivos de entrada
+        partial = output.with_name(output.name + ".partial")
+        written = 0
+        try:
+            with open(partial, "w", newline="", encoding="utf-8") as file:
+                writer = csv.writer(file)
+                writer.writerow(RESULTS_CSV_HEADER)
+                for row in rows:
+                    writer.writerow(row)
+                    written += 1
+        except BaseException:
+            # Un error a mitad (p.ej. una fila mal formada) no deja restos
+            partial.unlink(missing_ok=True)
+            raise
+        os.replace(partial, output)
+    return counter[0], written
+
+
+# Privados
+
+
+def _read_rows(paths: list[Path]) -> Iterator[Row]:
+    """Lee en flujo las filas de varios archivos de resultados
+
+    Las columnas se reordenan según 'RESULTS_CSV_HEADER', y las opcionales
+    que falten se dejan vacías.
+
+    """
+    for path in paths:
+        with open(path, newline="", encoding="utf-8") as file:
+            reader = csv.reader(file)
+            header = next(reader, None)
+            if header is None:
+                continue
+            missing = [
+                name
+                for name in RESULTS_CSV_HEADER
+                if name not in header and name not in OPTIONAL_COLUMNS
+            ]
+            if missing:
+                raise ValueError(
+                    f"El archivo {path} no es un archivo de resultados válido "
+                    f"(faltan las columnas {', '.join(missing)})"
+                )
+            indexes = [
+                header.index(name) if name in header else None
+                for name in RESULTS_CSV_HEADER
+            ]
+            for row in reader:
+                if row:
+                    yield [row[idx] if idx is not None else "" for idx in indexes]
+
+
+def _count(rows: Iterable[Row], counter: list[int]) -> Iterator[Row]:
+    """Cuenta las filas que pasan por el flujo, en 'counter[0]'"""
+    for row in rows:
+        counter[0] += 1
+        yield row
+
+
+def _key_symbol(row: Row) -> tuple[str, str, float]:
+    """Clave de ordenación por país, símbolo e instante de tiempo"""
+    return row[IDX_COUNTRY], row[IDX_SYMBOL], float(row[IDX_TIMESTAMP])
+
+
+def _key_time(row: Row) -> tuple[float, str, str]:
+    """Clave de ordenación por instante de tiempo, país y símbolo"""
+    return float(row[IDX_TIMESTAMP]), row[IDX_COUNTRY], row[IDX_SYMBOL]
+
+
+def _external_sort(
+    rows: Iterable[Row],
+    key: Callable[[Row], tuple],
+    run_size: int,
+    tmp_dir: Path,
+) -> Iterator[Row]:
+    """Ordena un flujo de filas con memoria acotada
+
+    Ordena las filas en bloques de 'run_size', guarda cada bloque ordenado
+    en un archivo temporal dentro de 'tmp_dir', y mezcla después todos los
+    bloques. Cada bloque se guarda (y se libera) antes de leer el siguiente,
+    incluso si es el único, de forma que nunca hay más de 'run_size' filas en
+    memoria.
+
+    Nunca se mezclan más de 'MAX_FAN_IN' bloques a la vez: si hay más, se
+    mezclan por grupos en bloques intermedios, en tantas pasadas como haga
+    falta.
+
+    """
+    runs = []
+    for block in chunked(rows, run_size):
+        block.sort(key=key)
+        runs.append(_write_run(block, tmp_dir, len(runs)))
+        # Se libera antes de que 'chunked' forme el siguiente bloque
+        del block
+    if not runs:
+        return
+    # Pasadas intermedias, hasta que queden como mucho 'MAX_FAN_IN' bloques
+    n_written = len(runs)
+    while len(runs) > MAX_FAN_IN:
+        merged = []
+        for group in chunked(runs, MAX_FAN_IN):
+            merged.append(_write_run(_merge_runs(group, key), tmp_dir, n_written))
+            n_written += 1
+        runs = merged
+    yield from _merge_runs(runs, key)
+
+
+def _merge_runs(runs: list[Path], key: Callable[[Row], tuple]) -> Iterator[Row]:
+    """Mezcla ordenadamente varios bloques, y los borra al terminar"""
+    with ExitStack() as stack:
+        readers = [
+            csv.reader(stack.enter_context(open(run, newline="", encoding="utf-8")))
+            for run in runs
+        ]
+        yield from heapq.merge(*readers, key=key)
+    for run in runs:
+        run.unlink()
+
+
+def _write_run(block: Iterable[Row], tmp_dir: Path, n: int) -> Path:
+    """Guarda un bloque ordenado de filas en un archivo temporal"""
+    tmp_dir.mkdir(exist_ok=True)
+    path = tmp_dir / f"run{n:05}.csv"
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        csv.writer(file).writerows(block)
+    return path
+
+
+def _dedupe(rows: Iterable[Row], tolerance: float) -> Iterator[Row]:
+    """Descarta las instantáneas duplicadas de un flujo de filas
+
+    Las filas deben llegar ordenadas por país, símbolo e instante de tiempo.
+    Una fila es duplicada si es del mismo país y símbolo que la última
+    conservada, y está separada de ella 'tolerance' segundos o menos. Sus
+    listas de acciones se añaden a las de la fila conservada.
+
+    """
+    kept = None
+    for row in rows:
+        if (
+            kept is not None
+            and row[IDX_COUNTRY] == kept[IDX_COUNTRY]
+            and row[IDX_SYMBOL] == kept[IDX_SYMBOL]
+            and float(row[IDX_TIMESTAMP]) - float(kept[IDX_TIMESTAMP]) <= tolerance
+        ):
+            kept[IDX_LISTS] = _merge_lists(kept[IDX_LISTS], row[IDX_LISTS])
+            continue
+        if kept is not None:
+            yield kept
+        kept = row
+    if kept is not None:
+        yield kept
+
+
+def _merge_lists(first: str, second: str) -> str:
+    """Une dos campos 'Lists', ordenando las listas según 'MARKET_LISTS'"""
+    lists = {
+        name
+        for name in (*first.split(LISTS_SEPARATOR), *second.split(LISTS_SEPARATOR))
+        if name
+    }
+    order = {name: i for i, name in enumerate(MARKET_LISTS)}
+    return LISTS_SEPARATOR.join(
+        sorted(lists, key=lambda name: (order.get(name, len(order)), name))
+    )
+
+
+def setup() -> argparse.ArgumentParser:
+    """Setup de los comandos válidos
+
+    <paths-to-results-csv> ...
+    -o --output <path-to-merged-csv>
+    -r --run-size <rows-per-sorted-run>
+    -t --tolerance <max-seconds-between-duplicates>
+    --tmp-dir <path-to-dir-for-temporary-files>
+    -q --quiet
+
+    Devuelve el parser configurado con los argumentos anteriores.
+
+    """
+    parser = argparse.ArgumentParser(
+        description="Une varios archivos de resultados de StockScraper en un histórico"
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        type=str,
+        help="Rutas a los archivos CSV de resultados a unir",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        default=str(DEFAULT_DATA_DIR / "history.csv"),
+        help="Ruta al archivo CSV de salida (por defecto, 'data/history.csv')",
+    )
+    parser.add_argument(
+        "-r",
+        "--run-size",
+        type=int,
+        default=DEFAULT_RUN_SIZE,
+        help="Número máximo de filas a ordenar en memoria a la vez",
+    )
+    parser.add_argument(
+        "-t",
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="""
+            Separación máxima (en segundos) entre dos instantáneas del mismo
+            símbolo para considerarlas duplicadas
+        """,
+    )
+    parser.add_argument(
+        "--tmp-dir",
+        type=str,
+        help="Ruta al directorio donde guardar los archivos temporales",
+    )
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="No muestra ninguna información durante la ejecución",
+    )
+    return parser
+
+
+def run() -> None:
+    """Función principal de la unión de resultados"""
+    parser = setup()
+    args = parser.parse_args()
+    vprint = VerbosePrinter(0 if args.quiet else 1)
+
+    vprint.info(f"Uniendo {len(args.inputs)} archivos de resultados...")
+    read, written = merge_results(
+        args.inputs,
+        args.output,
+        run_size=args.run_size,
+        tolerance=args.tolerance,
+        tmp_dir=args.tmp_dir,
+    )
+    vprint.info(f"Filas leídas: {read}, duplicadas descartadas: {read - written}")
+    vprint.info(f"Histórico guardado en {args.output}")
@@ -0,0 +1,281 @@
+# 19/10/2026
+"""Servidor de mercado simulado para StockScraper
+
+Presenta la clase MockMarketServer, un pequeño servidor HTTP local que imita
+las páginas de listas de acciones de 'https://www.tradingview.com/markets/'
+para todos los países de un archivo 'countries.csv'. Permite probar el
+rendimiento del scraper sin consultar la web real.
+
+Las páginas se sirven desde una carpeta con copias guardadas de la web
+('<token>-<lista>.html', que se pueden descargar con 'record_pages'), o se
+generan de forma sintética y reproducible si no existe copia. El servidor
+puede simular latencia, errores y limitación de peticiones ('Retry-After').
+
+"""
+
+import csv
+import random
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from time import monotonic, sleep
+from typing import Self
+
+import requests
+
+from source.stockscraper import MARKET_LISTS, STOCKS_URL
+from source.utils import check_path
+
+MOCK_URL = "http://{host}:{port}/markets/{{token}}/market-movers-{{list}}/"
+
+SYNTHETIC_ROWS = 100
+SYNTHETIC_HEADER = [
+    "Symbol",
+    "Vol * Price",
+    "Price",
+    "Change %",
+    "Volume",
+    "Rel Volume",
+    "Market cap",
+    "P/E",
+    "EPS dil TTM",
+    "EPS dil growth TTM YoY",
+    "Div yield % TTM",
+    "Sector",
+    "Analyst Rating",
+]
+SYNTHETIC_SECTORS = [
+    "Commercial services",
+    "Consumer durables",
+    "Electronic technology",
+    "Finance",
+    "Health technology",
+    "Retail trade",
+    "Technology services",
+    "Utilities",
+    "—",
+]
+
+
+class MockMarketServer:
+    """Servidor HTTP local que simula las páginas de mercados de valores
+
+    El constructor recibe la ruta al archivo de países, cuyos tokens de URL
+    serán los únicos servidos (el resto responden 404), y opcionalmente la
+    carpeta con las páginas guardadas ('pages_dir').
+
+    El comportamiento del servidor se ajusta con:
+    - 'latency' y 'jitter': segundos de espera antes de cada respuesta, más
+      una variación aleatoria uniforme de +-'jitter'.
+    - 'error_rate': proporción de peticiones que fallan con un error 500.
+    - 'rate_limit': máximo de peticiones por segundo; las que lo superan
+      reciben un 429 con cabecera 'Retry-After' de 'retry_after' segundos.
+    - 'seed': semilla para los valores aleatorios.
+
+    Se inicia con 'start' (devuelve la URL a usar como 'stocks_url' de
+    StockScraper) y se detiene con 'stop'; también puede usarse mediante
+    'with'.
+
+    """
+
+    def __init__(
+        self,
+        countries: str | Path,
+        pages_dir: str | Path | None = None,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: float | None = None,
+        retry_after: float = 1.0,
+        seed: int | None = None,
+    ) -> None:
+        with open(check_path(countries, raises=True)) as file:
+            reader = csv.reader(file)
+            next(reader)  # Salta la cabecera
+            self._tokens = {token for _, _, token in reader}
+        self._pages_dir = (
+            check_path(pages_dir, is_dir=True, raises=True) if pages_dir else None
+        )
+        self._pages: dict[tuple[str, str], bytes] = {}
+        self._address = (host, port)
+        self._latency = latency
+        self._jitter = jitter
+        self._error_rate = error_rate
+        self._rate_limit = rate_limit
+        self._retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window: list[float] = []
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    # Público
+
+    @property
+    def url(self) -> str:
+        """URL de las listas de acciones del servidor, con el formato de
+        'STOCKS_URL'"""
+        if self._server is None:
+            raise RuntimeError("El servidor no está iniciado")
+        host, port = self._server.server_address[:2]
+        return MOCK_URL.format(host=host, port=port)
+
+    def start(self) -> str:
+        """Inicia el servidor en segundo plano y devuelve su URL"""
+        handler = type("_Handler", (_MockHandler,), {"market": self})
+        self._server = ThreadingHTTPServer(self._address, handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self) -> None:
+        """Detiene el servidor"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = self._thread = None
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    # Privados
+
+    def _respond(self, path: str) -> tuple[int, dict[str, str], bytes]:
+        """Calcula la respuesta a una petición GET
+
+        Devuelve el código de estado, las cabeceras y el cuerpo.
+
+        """
+        with self._lock:
+            # Limitación de peticiones, con una ventana deslizante de 1 segundo
+            now = monotonic()
+            self._window = [t for t in self._window if now - t < 1.0]
+            if self._rate_limit is not None and len(self._window) >= self._rate_limit:
+                headers = {"Retry-After": f"{self._retry_after:g}"}
+                return 429, headers, b"Too Many Requests"
+            self._window.append(now)
+            delay = self._latency + self._random.uniform(-self._jitter, self._jitter)
+            failed = self._random.random() < self._error_rate
+        sleep(max(delay, 0.0))
+        if failed:
+            return 500, {}, b"Internal Server Error"
+        # Rutas con la forma '/markets/<token>/market-movers-<lista>/'
+        parts = path.strip("/").split("/")
+        if len(parts) != 3 or parts[0] != "markets" or parts[1] not in self._tokens:
+            return 404, {}, b"Not Found"
+        market_list = parts[2].removeprefix("market-movers-")
+        if market_list not in MARKET_LISTS:
+            return 404, {}, b"Not Found"
+        headers = {"Content-Type": "text/html; charset=utf-8"}
+        return 200, headers, self._page(parts[1], market_list)
+
+    def _page(self, token: str, market_list: str) -> bytes:
+        """Devuelve la página de una lista de acciones de un país
+
+        Usa la copia guardada si existe, y si no, genera una sintética.
+
+        """
+        key = (token, market_list)
+        if key not in self._pages:
+            saved = (
+                self._pages_dir / f"{token}-{market_list}.html"
+                if self._pages_dir
+                else None
+            )
+            if saved is not None and saved.exists():
+                page = saved.read_bytes()
+            else:
+                page = synthetic_page(token, market_list).encode("utf-8")
+            with self._lock:
+                self._pages[key] = page
+        return self._pages[key]
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    """Gestor de peticiones HTTP de MockMarketServer"""
+
+    market: MockMarketServer
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        status, headers, body = self.market._respond(self.path)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        """Silencia el registro de peticiones"""
+
+
+def synthetic_page(token: str, market_list: str) -> str:
+    """Genera una página sintética de una lista de acciones de un país
+
+    La tabla tiene la misma estructura que la de la web original, con
+    'SYNTHETIC_ROWS' acciones. El contenido depende sólo del token y la
+    lista, y las distintas listas de un mismo país comparten parte de sus
+    acciones.
+
+    """
+    rng = random.Random(zlib.crc32(f"{token}/{market_list}".encode()))
+    currency = token.removeprefix("stocks-")[:2].upper() + "D"
+    offset = MARKET_LISTS.index(market_list) * SYNTHETIC_ROWS // 2
+    header = "".join(f"<th>{title}</th>" for title in SYNTHETIC_HEADER)
+    rows = []
+    for i in range(offset, offset + SYNTHETIC_ROWS):
+        symbol = f"S{zlib.crc32(f'{token}/{i}'.encode()) % 100_000:05}"
+        cells = {
+            "Symbol": f'<a href="#">{symbol}</a><sup>{symbol} Corporation</sup>',
+            "Price": f"{rng.uniform(1, 5_000):,.2f} {currency}",
+            "Volume": f"{rng.uniform(1, 999):.2f} {rng.choice('KM')}",
+            "Market cap": (
+                f"{rng.uniform(1, 999):.2f} {rng.choice('MBT')} {currency}"
+                if rng.random() > 0.05
+                else "—"
+            ),
+            "Sector": rng.choice(SYNTHETIC_SECTORS),
+        }
+        row = "".join(f"<td>{cells.get(title, '—')}</td>" for title in SYNTHETIC_HEADER)
+        rows.append(f"<tr>{row}</tr>")
+    return (
+        "<!DOCTYPE html><html><body><table>"
+        f"<thead><tr>{header}</tr></thead><tbody>{''.join(rows)}</tbody>"
+        "</table></body></html>"
+    )
+
+
+def record_pages(
+    countries: str | Path,
+    pages_dir: str | Path,
+    lists: list[str] | tuple[str, ...] = ("active",),
+) -> None:
+    """Guarda una copia de las páginas de la web original
+
+    Descarga, para cada país del archivo 'countries' y cada lista de 'lists',
+    la página correspondiente de la web, y la guarda en 'pages_dir' con el
+    nombre '<token>-<lista>.html', listo para servir con MockMarketServer.
+
+    """
+    pages_dir = check_path(pages_dir, is_dir=True, raises=True)
+    with open(check_path(countries, raises=True)) as file:
+        reader = csv.reader(file)
+        next(reader)  # Salta la cabecera
+        tokens = [token for _, _, token in reader]
+    with requests.Session() as session:
+        for token in tokens:
+            for market_list in lists:
+                res = session.get(STOCKS_URL.format(token=token, list=market_list))
+                res.raise_for_status()
+                (pages_dir / f"{token}-{market_list}.html").write_bytes(res.content)
@@ -0,0 +1,159 @@
+# 19/10/2026
+"""Perfilado de StockScraper
+
+Presenta la clase StageProfiler, que captura perfiles de CPU (cProfile) y de
+memoria (tracemalloc) de cada fase del scraping: descarga ('fetch'), análisis
+del HTML ('parse'), normalización de cantidades ('normalize') y escritura de
+resultados ('write').
+
+Cada perfil se etiqueta con la iteración y el país en el que se tomó, y se
+guarda como archivo de 'pstats' en la carpeta de perfiles, junto con un
+resumen de las funciones más costosas por fase y del crecimiento de memoria
+entre iteraciones.
+
+Perfilar tiene un coste notable (cada página tarda unas 6 veces más en
+procesarse), sobre todo por tracemalloc; por eso sólo se registra un marco de
+pila por reserva de memoria ('TRACEMALLOC_FRAMES').
+
+"""
+
+import cProfile
+import io
+import pstats
+import tracemalloc
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Self
+
+STAGES = ("fetch", "parse", "normalize", "write")
+
+DEFAULT_TOP = 20
+# Con un solo marco por reserva, tracemalloc añade mucho menos coste
+TRACEMALLOC_FRAMES = 1
+
+
+class StageProfiler:
+    """Perfilador de CPU y memoria por fases
+
+    El constructor recibe la carpeta donde se guardarán los perfiles (se crea
+    si no existe) y el número de entradas a mostrar en el resumen ('top').
+
+    Antes de cada bloque de trabajo, se indica la iteración y el país en curso
+    con 'tag'; y cada fase se perfila dentro de un 'with profiler.stage(...)'.
+    Al final de cada iteración, 'end_loop' toma una instantánea de memoria;
+    al terminar, 'save_summary' escribe el resumen; y, en cualquier caso,
+    'close' detiene tracemalloc (también se puede usar mediante 'with').
+
+    """
+
+    def __init__(self, output_dir: str | Path, *, top: int = DEFAULT_TOP) -> None:
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._top = top
+        self._loop = 0
+        self._country = "all"
+        self._stats: dict[str, pstats.Stats] = {}
+        self._memory: dict[str, list[int]] = defaultdict(lambda: [0, 0, 0])
+        self._snapshots: list[tracemalloc.Snapshot] = []
+        self._counts: dict[tuple[int, str, str], int] = defaultdict(int)
+        # Sólo se detendrá tracemalloc al final si se inicia aquí
+        self._tracing = not tracemalloc.is_tracing()
+        if self._tracing:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    # Público
+
+    def tag(self, loop: int, country: str = "all") -> None:
+        """Indica la iteración y el país de las siguientes fases"""
+        self._loop = loop
+        self._country = country
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Perfila una fase del scraping
+
+        Guarda el perfil de CPU en '<carpeta>/loopNN_<país>_<fase>[_K].prof'
+        (el sufijo '_K' distingue varias ejecuciones de la misma fase, p.ej.
+        una por lista de acciones) y acumula la memoria reservada.
+
+        """
+        profile = cProfile.Profile()
+        tracemalloc.reset_peak()
+        mem_start = tracemalloc.get_traced_memory()[0]
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            mem_end, mem_peak = tracemalloc.get_traced_memory()
+            key = (self._loop, self._country, name)
+            count = self._counts[key]
+            self._counts[key] += 1
+            suffix = f"_{count}" if count else ""
+            filename = f"loop{self._loop:02}_{self._country}_{name}{suffix}.prof"
+            profile.dump_stats(self.output_dir / filename)
+            if name in self._stats:
+                self._stats[name].add(profile)
+            else:
+                self._stats[name] = pstats.Stats(profile)
+            memory = self._memory[name]
+            memory[0] += 1
+            memory[1] += mem_end - mem_start
+            memory[2] = max(memory[2], mem_peak - mem_start)
+
+    def end_loop(self) -> None:
+        """Toma una instantánea de memoria al final de una iteración"""
+        self._snapshots.append(tracemalloc.take_snapshot())
+
+    def save_summary(self) -> Path:
+        """Escribe el resumen de los perfiles
+
+        Devuelve la ruta al archivo de resumen ('summary.txt').
+
+        """
+        stream = io.StringIO()
+        # Memoria por fase
+        stream.write("=== Memoria por fase ===\n")
+        stream.write(
+            f"{'Fase':<12}{'Llamadas':>10}{'Neta (KB)':>14}{'Pico (KB)':>14}\n"
+        )
+        for name in sorted(self._memory, key=_stage_order):
+            calls, net, peak = self._memory[name]
+            stream.write(
+                f"{name:<12}{calls:>10}{net / 1024:>14.1f}{peak / 1024:>14.1f}\n"
+            )
+        # Funciones más costosas por fase
+        for name in sorted(self._stats, key=_stage_order):
+            stream.write(f"\n=== CPU: {name} (top {self._top}) ===\n")
+            stats = self._stats[name]
+            stats.stream = stream
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self._top)
+        # Crecimiento de memoria entre iteraciones
+        for i, (before, after) in enumerate(
+            zip(self._snapshots, self._snapshots[1:]), start=2
+        ):
+            stream.write(f"\n=== Memoria: iteración {i - 1} -> {i} ===\n")
+            for diff in after.compare_to(before, "lineno")[: self._top]:
+                stream.write(f"{diff}\n")
+        path = self.output_dir / "summary.txt"
+        path.write_text(stream.getvalue(), encoding="utf-8")
+        return path
+
+    def close(self) -> None:
+        """Detiene tracemalloc, si se inició al crear el perfilador"""
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _stage_order(name: str) -> int:
+    """Ordena las fases según 'STAGES'"""
+    return STAGES.index(name) if name in STAGES else len(STAGES)
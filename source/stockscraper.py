@@ -1,4 +1,4 @@
-# 08/11/2024
+# 19/10/2026
 """StockScraper
 
 Presenta la clase StockScraper, encargada de realizar las funciones de
@@ -10,11 +10,13 @@ La web que se usa para consulatr es 'https://www.tradingview.com/markets/'.
 """
 
 import csv
+from collections.abc import Container, Iterable
+from contextlib import AbstractContextManager, nullcontext
 from pathlib import Path
-from time import perf_counter, sleep, time
+from time import perf_counter, sleep, strftime, time
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
 from more_itertools import chunked
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
@@ -23,13 +25,16 @@ from selenium.webdriver.remote.webdriver import WebDriver
 from webdriver_manager.chrome import ChromeDriverManager
 
 from source.countries_selector_wizard import CountriesSelector
+from source.profiling import StageProfiler
 from source.utils import VerbosePrinter, check_path, q_normalize
 
 ScrapedRow = tuple[str, str, float, str, float, float | None, str | None]
+RawRow = tuple[str, str, str, str, str, str, str]
 
 DEFAULT_DATA_DIR = Path(__file__).parent.parent / "data"
 
 COUNTRIES_CSV_HEADERS = ["Continent", "Country", "URLToken"]
+WATCHLIST_CSV_HEADERS = ["Country", "Symbol"]
 RESULTS_CSV_HEADER = [
     "Timestamp",
     "Region",
@@ -41,9 +46,14 @@ RESULTS_CSV_HEADER = [
     "Volume (M)",
     "Market Cap (M)",
     "Sector",
+    "Lists",
 ]
 
-STOCKS_URL = "https://www.tradingview.com/markets/{token}/market-movers-active/"
+STOCKS_URL = "https://www.tradingview.com/markets/{token}/market-movers-{list}/"
+
+MARKET_LISTS = ("active", "gainers", "losers", "large-cap")
+DEFAULT_MARKET_LISTS = ("active",)
+LISTS_SEPARATOR = "|"
 
 TESTING_COUNTRY = ("North America", "USA", "stocks-usa")
 
@@ -53,8 +63,22 @@ TD_IDX_STOCK_VOLUME = 4
 TD_IDX_MARKET_CAP = 6
 TD_IDX_SECTOR = -2
 
+# Cabeceras de la tabla, para ubicar las columnas en cada tipo de lista
+TH_STOCK_NAME = "symbol"
+TH_STOCK_PRICE = "price"
+TH_STOCK_VOLUME = "volume"
+TH_MARKET_CAP = "market cap"
+TH_SECTOR = "sector"
+
 T_MIN_WAIT = 3.0
 
+# Reintentos ante respuestas de error temporales (p.ej. limitación de peticiones)
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 3
+T_RETRY = 1.0
+# Espera máxima aceptada de la cabecera 'Retry-After' (en segundos)
+MAX_RETRY_WAIT = 60.0
+
 VERBOSE_SILENT = 0
 VERBOSE_NORMAL = 1
 VERBOSE_DEBUG = 2
@@ -70,6 +94,15 @@ class StockScraper:
     1 (por defecto) muestra mensajes informativos, y un nivel 2 muestra
     mensajes de depuración.
 
+    Opcionalmente, 'stocks_url' permite consultar otro servidor distinto de
+    la web original (p.ej. el servidor de pruebas de 'source.mockserver'). Debe
+    contener los campos '{token}' y '{list}', como 'STOCKS_URL'.
+
+    Si 'profile' es True, cada llamada a 'scrape' captura perfiles de CPU y
+    memoria de cada fase (ver 'source.profiling'), y los guarda en una
+    subcarpeta propia de cada ejecución ('profile/<fecha>-<hora>'), junto al
+    archivo de resultados.
+
     """
 
     def __init__(
@@ -77,9 +110,14 @@ class StockScraper:
         selenium_webdriver_executable: Path | str = "",
         *,
         verbose_mode: int = VERBOSE_NORMAL,
+        stocks_url: str = STOCKS_URL,
+        profile: bool = False,
     ) -> None:
         self._executable = selenium_webdriver_executable
         self._verbose = verbose_mode
+        self._stocks_url = stocks_url
+        self._profile = profile
+        self._profiler: StageProfiler | None = None
         DEFAULT_DATA_DIR.mkdir(exist_ok=True)
 
     # Público
@@ -115,7 +153,7 @@ class StockScraper:
         vprint.debug("WebDriver correctamente configurado")
         # Cargamos la web
         vprint.info("Cargando todos los países disponibles...")
-        driver.get(STOCKS_URL.format(token=TESTING_COUNTRY[-1]))
+        driver.get(STOCKS_URL.format(token=TESTING_COUNTRY[-1], list="active"))
         driver.implicitly_wait(10)
         # Clicamos el botón de "US stocks", que nos lleva a un menú para seleccionar países
         all_buttons = driver.find_elements(By.TAG_NAME, "button")
@@ -169,6 +207,8 @@ class StockScraper:
         loops: int = 1,
         wait: float = 5.0,
         output_dir: str | Path | None = None,
+        lists: Iterable[str] = DEFAULT_MARKET_LISTS,
+        watchlist: str | Path | Iterable[tuple[str, str]] | None = None,
         verbose: bool = False,
     ) -> Path:
         """Realiza el scraping de los mercados de valores de los países
@@ -190,6 +230,18 @@ class StockScraper:
         resultados en formato CSV, 'results.csv'. Si no se indica nada, se
         guardará en el la carepta 'data' del directorio de trabajo.
 
+        'lists' indica qué listas de acciones se consultan para cada país (ver
+        'MARKET_LISTS'; por defecto, sólo las más activas). Todas se descargan
+        reutilizando las mismas conexiones, y las acciones que aparecen en
+        varias listas se guardan una sola vez por iteración, indicando en la
+        columna 'Lists' en cuáles aparecen.
+
+        'watchlist' permite limitar los resultados a unas acciones concretas.
+        Puede ser una secuencia de pares (país, símbolo), o la ruta a un
+        archivo CSV con esos pares (cabecera 'Country,Symbol'). Las filas de
+        otras acciones se descartan nada más leer su símbolo, y los países sin
+        ninguna acción vigilada no se consultan.
+
         'verbose' indica si se mostrarán mensajes informativos durante la
         ejecución.
 
@@ -199,6 +251,13 @@ class StockScraper:
         """
         vprint = VerbosePrinter(self._verbose)
 
+        # Comprobamos las listas de acciones a consultar
+        lists = list(dict.fromkeys(lists))
+        if not lists or any(market_list not in MARKET_LISTS for market_list in lists):
+            raise ValueError(
+                f"Listas de acciones no válidas: {lists} (opciones: {MARKET_LISTS})"
+            )
+
         # Comprobamos 'countries' y generamos la lista de países
         if countries == "testing":
             countries = [TESTING_COUNTRY]
@@ -222,8 +281,16 @@ class StockScraper:
                 reader = csv.reader(file)
                 next(reader)  # Salta la cabecera
                 countries.extend(reader)
+        # Si hay lista de acciones vigiladas, sólo se consultan sus países
+        watched = None
+        if watchlist is not None:
+            watched = self._load_watchlist(watchlist)
+            countries = [row for row in countries if row[1] in watched]
+            n_watched = sum(len(symbols) for symbols in watched.values())
+            vprint.info(f"Se vigilarán {n_watched} acciones")
         n_countries = len(countries)
         vprint.info(f"Se consultarán mercados de {n_countries} países")
+        vprint.info(f"Listas de acciones consultadas: {', '.join(lists)}")
 
         # Comprobamos que la carpeta de salida exista
         if output_dir:
@@ -231,40 +298,76 @@ class StockScraper:
         else:
             output_dir = DEFAULT_DATA_DIR
 
-        # Ejecutamos el scraping, 'loops' veces, esperando 'wait' minutos
-        wait = max(wait, T_MIN_WAIT)
-        results = []
-        for i in range(loops):
-            vprint.info(f"\nIteración {i + 1} de {loops} ({i/loops:.0%})")
-            # Iniciamos el contador de tiempo
-            tstart = perf_counter()
-            timestamp = time()
-            # Por cada país, realizamos el scraping
-            for j, (continent, country, url_token) in enumerate(countries, start=1):
-                url = STOCKS_URL.format(token=url_token)
-                _p = (j - 1) / n_countries
-                vprint.info(
-                    f"| {_p: >6.2%}  {j:02}/{n_countries}  -  Consultando {url!r}"
-                )
-                for row in self._url_scrape(url):
-                    results.append((timestamp, continent, country, *row))
-                vprint.debug(f"+ {len(results)} filas totales (última: {results[-1]})")
-            vprint.info(
-                f"Iteración {i + 1} finalizada en {perf_counter()-tstart:.2f} segundos"
-            )
-            # Si quedan iteraciones, esperamos 'wait' minutos
-            if i < loops - 1:
-                vprint.info(f"Esperando {wait} minutos a la siguiente iteración...")
-                sleep(wait * 60)
-
-        # Guardamos los resultados en un CSV
-        with open(
-            output_dir / "results.csv", "w", newline="", encoding="utf-8"
-        ) as file:
-            writer = csv.writer(file)
-            writer.writerow(RESULTS_CSV_HEADER)
-            writer.writerows(results)
-        vprint.info(f"\nResultados guardados en {output_dir / 'results.csv'}")
+        # Si se perfila, los perfiles se guardan junto a los resultados, en una
+        # carpeta por ejecución para no mezclarlos con los de otras anteriores
+        if self._profile:
+            profile_dir = output_dir / "profile" / strftime("%Y%m%d-%H%M%S")
+            self._profiler = StageProfiler(profile_dir)
+            vprint.info(f"Perfilado activado, en {self._profiler.output_dir}")
+
+        try:
+            # Ejecutamos el scraping, 'loops' veces, esperando 'wait' minutos
+            wait = max(wait, T_MIN_WAIT)
+            results = []
+            # La sesión reutiliza las conexiones entre listas, países e iteraciones
+            with requests.Session() as session:
+                for i in range(loops):
+                    vprint.info(f"\nIteración {i + 1} de {loops} ({i/loops:.0%})")
+                    # Iniciamos el contador de tiempo
+                    tstart = perf_counter()
+                    timestamp = time()
+                    # Por cada país, realizamos el scraping
+                    for j, (continent, country, url_token) in enumerate(
+                        countries, start=1
+                    ):
+                        if self._profiler:
+                            self._profiler.tag(i + 1, url_token)
+                        _p = (j - 1) / n_countries
+                        vprint.info(
+                            f"| {_p: >6.2%}  {j:02}/{n_countries}  -  Consultando {country!r}"
+                        )
+                        only = watched[country] if watched is not None else None
+                        for row in self._country_scrape(
+                            url_token, lists, session, only=only
+                        ):
+                            results.append((timestamp, continent, country, *row))
+                        if results:
+                            vprint.debug(
+                                f"+ {len(results)} filas totales (última: {results[-1]})"
+                            )
+                    vprint.info(
+                        f"Iteración {i + 1} finalizada en {perf_counter()-tstart:.2f} segundos"
+                    )
+                    if self._profiler:
+                        self._profiler.end_loop()
+                    # Si quedan iteraciones, esperamos 'wait' minutos
+                    if i < loops - 1:
+                        vprint.info(
+                            f"Esperando {wait} minutos a la siguiente iteración..."
+                        )
+                        sleep(wait * 60)
+
+            # Guardamos los resultados en un CSV
+            if self._profiler:
+                self._profiler.tag(loops)
+            with (
+                self._stage("write"),
+                open(
+                    output_dir / "results.csv", "w", newline="", encoding="utf-8"
+                ) as file,
+            ):
+                writer = csv.writer(file)
+                writer.writerow(RESULTS_CSV_HEADER)
+                writer.writerows(results)
+            vprint.info(f"\nResultados guardados en {output_dir / 'results.csv'}")
+            if self._profiler:
+                summary = self._profiler.save_summary()
+                vprint.info(f"Resumen del perfilado guardado en {summary}")
+        finally:
+            # Se cierra el perfilador incluso si el scraping falla
+            if self._profiler:
+                self._profiler.close()
+                self._profiler = None
         return output_dir / "results.csv"
 
     # Privados
@@ -289,41 +392,138 @@ class StockScraper:
             options.add_experimental_option("excludeSwitches", ["enable-logging"])
             return webdriver.Chrome(executable_path=self._executable, options=options)
 
-    def _url_scrape(self, url: str) -> list[ScrapedRow]:
+    def _country_scrape(
+        self,
+        url_token: str,
+        lists: list[str],
+        session: requests.Session | None = None,
+        *,
+        only: Container[str] | None = None,
+    ) -> list[tuple]:
+        """Realiza el scraping de las listas de acciones de un país
+
+        Consulta cada una de las listas de 'lists' para el mercado del país
+        indicado por 'url_token'. Las acciones que ya se obtuvieron en una
+        lista anterior no se vuelven a procesar, y si se indica 'only', sólo
+        se procesan las acciones cuyo símbolo esté en él.
+
+        Devuelve una matriz con los resultados de las acciones del país en el
+        instante de tiempo, con una última columna que indica en qué listas
+        aparece cada acción (separadas por 'LISTS_SEPARATOR').
+
+        """
+        found: dict[str, list[str]] = {}
+        data = []
+        for market_list in lists:
+            url = self._stocks_url.format(token=url_token, list=market_list)
+            rows, skipped = self._url_scrape(url, session, skip=found, only=only)
+            for row in rows:
+                found[row[0]] = [market_list]
+                data.append(row)
+            for symbol in skipped:
+                found[symbol].append(market_list)
+        return [(*row, LISTS_SEPARATOR.join(found[row[0]])) for row in data]
+
+    def _url_scrape(
+        self,
+        url: str,
+        session: requests.Session | None = None,
+        *,
+        skip: Container[str] = (),
+        only: Container[str] | None = None,
+    ) -> tuple[list[ScrapedRow], list[str]]:
         """Realiza el scraping de una URL de mercado de valores
 
-        Utiliza BeautifulSoup para analizar el HTML de la página.
+        Descarga la página (si se indica una sesión de 'requests', se usa
+        para reutilizar sus conexiones), extrae el texto de sus filas y lo
+        normaliza. Las acciones cuyo símbolo esté en 'skip', o no esté en
+        'only' (si se indica), no se procesan.
 
         Devuelve una matriz con los resultados de las acciones del país en el
-        instante de tiempo.
+        instante de tiempo, y la lista de símbolos omitidos.
+
+        """
+        with self._stage("fetch"):
+            res = self._get(url, session)
+        with self._stage("parse"):
+            raw, skipped = self._parse_rows(res.text, skip, only)
+        with self._stage("normalize"):
+            data = self._normalize_rows(raw)
+        return data, skipped
+
+    def _parse_rows(
+        self,
+        html: str,
+        skip: Container[str] = (),
+        only: Container[str] | None = None,
+    ) -> tuple[list[RawRow], list[str]]:
+        """Extrae el texto de las filas de la tabla de acciones de una página
+
+        Utiliza BeautifulSoup para analizar el HTML de la página. Las acciones
+        cuyo símbolo esté en 'skip' no se procesan (y se devuelven como
+        omitidas); y si se indica 'only', se descartan, sin procesar, las
+        acciones cuyo símbolo no esté en él.
+
+        Devuelve una matriz con el texto de cada acción (símbolo, nombre,
+        precio, moneda, volumen, capitalización y sector), y la lista de
+        símbolos omitidos.
 
         """
-        res = requests.get(url)
-        if res.status_code == 200:
-            soup = BeautifulSoup(res.text, "html.parser")
+        soup = BeautifulSoup(html, "html.parser")
         table = soup.find_all("table")[0]
         rows = table.find_all("tr")
+        idx_name, idx_price, idx_volume, idx_cap, idx_sector = self._column_indexes(
+            rows[0]
+        )
         data = []
+        skipped = []
         for row in rows[1:]:
             cells = row.find_all("td")
             # Símbolo y nombre de la acción
-            symbol = cells[TD_IDX_STOCK_NAME].find("a").text
-            name = cells[TD_IDX_STOCK_NAME].find("sup").text
+            symbol = cells[idx_name].find("a").text
+            if only is not None and symbol not in only:
+                continue
+            if symbol in skip:
+                skipped.append(symbol)
+                continue
+            name = cells[idx_name].find("sup").text
             # Precio y moneda de la acción
-            price_raw, currency = cells[TD_IDX_STOCK_PRICE].text.split()
-            price = float(price_raw.replace(",", ""))
+            price_raw, currency = cells[idx_price].text.split()
             # Volumen de la acción
-            volume = q_normalize(cells[TD_IDX_STOCK_VOLUME].text)
+            volume_raw = cells[idx_volume].text
             # Capitalización de mercado
-            market_cap_raw = "".join(cells[TD_IDX_MARKET_CAP].text.split()[:-1])
+            market_cap_raw = "".join(cells[idx_cap].text.split()[:-1])
+            # Sector/es
+            sector = cells[idx_sector].text
+            # Almacenar datos
+            data.append(
+                (symbol, name, price_raw, currency, volume_raw, market_cap_raw, sector)
+            )
+        return data, skipped
+
+    def _normalize_rows(self, raw: list[RawRow]) -> list[ScrapedRow]:
+        """Convierte el texto de las filas de acciones en valores numéricos
+
+        Devuelve una matriz con los resultados de las acciones.
+
+        """
+        data = []
+        for (
+            symbol,
+            name,
+            price_raw,
+            currency,
+            volume_raw,
+            market_cap_raw,
+            sector,
+        ) in raw:
+            price = float(price_raw.replace(",", ""))
+            volume = q_normalize(volume_raw)
             if not market_cap_raw:
                 market_cap = None
             else:
                 market_cap = q_normalize(market_cap_raw)
-            # Sector/es
-            sector = cells[TD_IDX_SECTOR].text
             sector = sector if sector != "—" else None
-            # Almacenar datos
             data.append(
                 (
                     symbol,
@@ -336,3 +536,96 @@ class StockScraper:
                 )
             )
         return data
+
+    @staticmethod
+    def _load_watchlist(
+        watchlist: str | Path | Iterable[tuple[str, str]],
+    ) -> dict[str, set[str]]:
+        """Carga la lista de acciones vigiladas
+
+        'watchlist' puede ser una secuencia de pares (país, símbolo), o la
+        ruta a un archivo CSV con esos pares y cabecera 'WATCHLIST_CSV_HEADERS'.
+        Del archivo se ignoran la marca BOM (p.ej. al guardarlo desde Excel) y
+        los espacios alrededor de cada campo.
+
+        Devuelve un diccionario con los símbolos vigilados de cada país.
+
+        """
+        if isinstance(watchlist, (str, Path)):
+            watchlist_path = check_path(watchlist, raises=True)
+            with open(watchlist_path, newline="", encoding="utf-8-sig") as file:
+                rows = ([cell.strip() for cell in row] for row in csv.reader(file))
+                header = next(rows, None)
+                if header != WATCHLIST_CSV_HEADERS:
+                    raise ValueError(
+                        f"El archivo {watchlist_path} debe tener la cabecera "
+                        f"{','.join(WATCHLIST_CSV_HEADERS)}"
+                    )
+                pairs = [tuple(row) for row in rows if any(row)]
+        else:
+            pairs = list(watchlist)
+        watched: dict[str, set[str]] = {}
+        for country, symbol in pairs:
+            watched.setdefault(country, set()).add(symbol)
+        return watched
+
+    def _stage(self, name: str) -> AbstractContextManager:
+        """Perfila una fase del scraping, si el perfilado está activado"""
+        if self._profiler is None:
+            return nullcontext()
+        return self._profiler.stage(name)
+
+    def _get(
+        self, url: str, session: requests.Session | None = None
+    ) -> requests.Response:
+        """Descarga una URL, reintentando ante errores temporales
+
+        Si el servidor responde con un código de 'RETRY_STATUS_CODES', se
+        espera lo que indique su cabecera 'Retry-After' (o, si no la incluye o
+        su valor no está entre 0 y 'MAX_RETRY_WAIT' segundos, un tiempo
+        creciente a partir de 'T_RETRY' segundos) y se reintenta,
+        hasta 'MAX_RETRIES' veces. Cualquier otro error se lanza como
+        excepción.
+
+        """
+        vprint = VerbosePrinter(self._verbose)
+        for attempt in range(MAX_RETRIES + 1):
+            res = (session or requests).get(url)
+            if res.status_code not in RETRY_STATUS_CODES or attempt == MAX_RETRIES:
+                break
+            try:
+                delay = float(res.headers.get("Retry-After", ""))
+            except ValueError:
+                delay = None
+            # Una espera negativa, no numérica o excesiva no se respeta
+            if delay is None or not 0.0 <= delay <= MAX_RETRY_WAIT:
+                delay = T_RETRY * 2**attempt
+            vprint.debug(f"! Error {res.status_code}, reintentando en {delay} s")
+            sleep(delay)
+        res.raise_for_status()
+        return res
+
+    @staticmethod
+    def _column_indexes(header: Tag) -> tuple[int, int, int, int, int]:
+        """Ubica las columnas de interés a partir de la cabecera de la tabla
+
+        Cada lista de acciones ordena las columnas de forma distinta, así que
+        se buscan por el texto de su cabecera. Si alguna no se encuentra, se
+        usa su posición en la lista de acciones más activas.
+
+        """
+        titles = [cell.text.strip().lower() for cell in header.find_all(["th", "td"])]
+
+        def find(title: str, default: int) -> int:
+            for idx, text in enumerate(titles):
+                if text.startswith(title):
+                    return idx
+            return default
+
+        return (
+            find(TH_STOCK_NAME, TD_IDX_STOCK_NAME),
+            find(TH_STOCK_PRICE, TD_IDX_STOCK_PRICE),
+            find(TH_STOCK_VOLUME, TD_IDX_STOCK_VOLUME),
+            find(TH_MARKET_CAP, TD_IDX_MARKET_CAP),
+            find(TH_SECTOR, TD_IDX_SECTOR),
+        )